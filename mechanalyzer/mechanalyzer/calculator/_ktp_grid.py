@@ -0,0 +1,48 @@
+"""
+Aligned-array storage of k(T,P)s, used by the rate calculators in rates
+"""
+
+import numpy as np
+
+
+class KTPGrid():
+    """ k(T,P) values for a single reaction, stored as aligned arrays with
+        one row per pressure. The high-P limit, if present, is stored as a
+        row with a pressure of numpy.inf, which sorts after all real pressures.
+    """
+
+    def __init__(self, pressures, temps, kts, keys=None):
+        """ Stores the arrays of pressures, temps, and k(T,P)s
+
+            :param pressures: pressures (atm), with numpy.inf for the high-P limit
+            :type pressures: numpy.ndarray of shape (npres,)
+            :param temps: temps (K) at which the k(T,P)s were evaluated
+            :type temps: numpy.ndarray of shape (npres, ntemps)
+            :param kts: k(T,P)s at each pressure and temp
+            :type kts: numpy.ndarray of shape (npres, ntemps)
+            :param keys: ktp_dct key for each pressure; defaults to the pressures
+                as given (e.g., ints stay ints), with 'high' for numpy.inf
+            :type keys: list
+        """
+        if keys is None:
+            keys = ['high' if np.isinf(pressure) else pressure for pressure in pressures]
+        self.pressures = np.asarray(pressures, dtype=float)
+        self.temps = np.asarray(temps, dtype=float)
+        self.kts = np.asarray(kts, dtype=float)
+        self.keys = list(keys)
+
+    def copy(self):
+        """ Returns a copy of the grid that shares no arrays with this one
+
+            :rtype: KTPGrid
+        """
+        return KTPGrid(self.pressures.copy(), self.temps.copy(), self.kts.copy(), self.keys)
+
+    def to_dict(self):
+        """ Converts the grid to a ktp_dct, keyed by the pressures the grid
+            was built with
+
+            :return ktp_dct: rate constant as a function of temp and pressure
+            :rtype: dict {pressure1: (temps1, kts1), pressure2: ..., 'high': ...}
+        """
+        return {key: (temps, kts) for key, temps, kts in zip(self.keys, self.temps, self.kts)}
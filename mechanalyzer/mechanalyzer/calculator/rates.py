@@ -2,16 +2,20 @@
 Calculate rates with various fitting functions
 """
 
-import copy
 import numpy as np
 from scipy.special import eval_chebyt
 from phydat import phycon
+from mechanalyzer.calculator._ktp_grid import KTPGrid
 
 RC = phycon.RC_cal  # gas constant in cal/(mol.K)
 RC2 = phycon.RC_atm  # gas constant in cm^3.atm/(mol.K)
 
+_PRECISION_DTYPES = {'fp64': np.float64, 'fp32': np.float32}
+_CACHE = {}  # per-rxn_param_dct classifications and Arrhenius k(T)s; see eval_rxn_param_dct
+_CACHE_SIZE = 1  # number of rxn_param_dcts kept in _CACHE, each held with a strong reference
 
-def eval_rxn_param_dct(rxn_param_dct, pressures, temps):
+
+def eval_rxn_param_dct(rxn_param_dct, pressures, temps, validate=True):
     """ Loop through all rxns in a rxn_param_dct and get a ktp_dct for
         each one. Return a rxn_ktp_dct.
 
@@ -21,40 +25,113 @@ def eval_rxn_param_dct(rxn_param_dct, pressures, temps):
         :type pressures:
         :param temps:
         :type temps:
+        :param validate: whether to check the pressures and temps with check_p_t
+        :type validate: bool
+
+        The functional form of each param_tup, and the Arrhenius k(T)s at the
+        most recent temps, are cached between calls with the same
+        rxn_param_dct object. The parameters themselves are read again on
+        every call, so changes made to them in place are picked up, as are
+        rxns that are added or have their param_tups replaced. The cache keeps
+        the most recent rxn_param_dct alive until clear_cache() is called.
     """
-    def add_ktp_dcts(ktp_dct1, ktp_dct2):
-        """ Add the rates in two ktp_dcts. The input dcts should have identical P and T values.
-            However, this may not always be true if one is from PLOG and one is from an expression
-            with a pressure-independent rate.
-        """
-        if ktp_dct1 == {}:  # if the starting dct is empty, just copy the addition
-            added_dct = copy.deepcopy(ktp_dct2)
-        else:
-            added_dct = {}
-            for pressure, (temps, kts1) in ktp_dct1.items():
-                if pressure in ktp_dct2.keys():
-                    (_, kts2) = ktp_dct2[pressure]  # unpack ktp_dct2 values
-                else:  # if the pressure is not in ktp_dct2
-                    kts2 = np.zeros(np.shape(kts1))  # just use an array of zeros
-                added_kts = kts1 + kts2
-                added_dct[pressure] = (temps, added_kts)  # store the added values
-
-        return added_dct
-
-    check_p_t(pressures, temps)  # enforce formatting rules
+    if validate:
+        check_p_t(pressures, temps)  # enforce formatting rules
+    rxn_cache = _rxn_cache(rxn_param_dct)
+    type_lsts = rxn_cache['type_lsts']
+    ktp_grids = dict.fromkeys(rxn_param_dct)
+
+    # Evaluate all pure Arrhenius expressions together; these only fill the high-P row
+    if type_lsts[ARR]:
+        highp_temps = temps if np.ndim(temps) == 1 else temps[-1]  # as in ktp()
+        arr_params = np.array([param_tup[0] for _, param_tup in type_lsts[ARR]], dtype=float)
+        arr_key = (np.shape(highp_temps), np.asarray(highp_temps, dtype=float).tobytes(),
+                   arr_params.tobytes())  # catches parameters changed in place
+        if rxn_cache['arr_key'] != arr_key:
+            rxn_cache['arr_kts'] = _arrhenius_batch(arr_params, highp_temps, t_ref=1.0)
+            rxn_cache['arr_key'] = arr_key
+        arr_kts = rxn_cache['arr_kts']
+        for (rxn, _), kts in zip(type_lsts[ARR], arr_kts):
+            # KTPGrid copies the cached row, so callers cannot modify the cache
+            new_ktp_grid = KTPGrid([np.inf], [highp_temps], [kts])
+            ktp_grids[rxn] = add_ktp_grids(ktp_grids[rxn], new_ktp_grid)
+
+    # Evaluate the other functional forms one param_tup at a time, reusing
+    # the results for param_tups that are repeated across rxns
+    ktp_grid_memo = {}
+    for type_code in (LIND, TROE, PLOG, CHEB):
+        kernel = _KERNELS[type_code]
+        for rxn, param_tup in type_lsts[type_code]:
+            _, args = _classify(param_tup)  # unpacked each call, as they may have changed
+            param_key = (type_code, _hashable(args))
+            if param_key in ktp_grid_memo:
+                new_ktp_grid = ktp_grid_memo[param_key].copy()  # rxns should not share arrays
+            else:
+                new_ktp_grid = kernel(*args, temps, pressures)
+                ktp_grid_memo[param_key] = new_ktp_grid
+            ktp_grids[rxn] = add_ktp_grids(ktp_grids[rxn], new_ktp_grid)
+
     rxn_ktp_dct = {}
-    for rxn, param_tups in rxn_param_dct.items():
-        ktp_dct = {}
-        for param_tup in param_tups:
-            new_ktp_dct = eval_param_tup(param_tup, pressures, temps)
-            ktp_dct = add_ktp_dcts(ktp_dct, new_ktp_dct)
-        rxn_ktp_dct[rxn] = ktp_dct
+    for rxn, ktp_grid in ktp_grids.items():
+        rxn_ktp_dct[rxn] = ktp_grid.to_dict() if ktp_grid is not None else {}
 
     return rxn_ktp_dct
 
 
+def clear_cache():
+    """ Clear the cached rxn_param_dct classifications and Arrhenius k(T)s.
+    """
+    _CACHE.clear()
+
+
+def _rxn_cache(rxn_param_dct):
+    """ Get the cache entry for a rxn_param_dct, classifying its param_tups
+        if it has not been seen before.
+
+        :param rxn_param_dct:
+        :type rxn_param_dct:
+        :return rxn_cache: the rxn_param_dct, its param_tups grouped by type code,
+            and the Arrhenius k(T)s with the temps they were evaluated at
+        :rtype: dict
+    """
+    rxn_cache = _CACHE.get(id(rxn_param_dct))
+
+    # The entry holds a reference to the dct, so its id cannot be reused while
+    # cached; it is also rebuilt if any rxn or param_tups has changed since
+    if (rxn_cache is None or rxn_cache['rxn_param_dct'] is not rxn_param_dct or
+            not _same_items(rxn_cache['items'], rxn_param_dct)):
+        rxn_type_dct = {}
+        for rxn, param_tups in rxn_param_dct.items():
+            rxn_type_dct[rxn] = tuple((_classify(param_tup)[0], param_tup)
+                                      for param_tup in param_tups)
+        rxn_cache = {'rxn_param_dct': rxn_param_dct,
+                     'items': tuple(rxn_param_dct.items()),
+                     'type_lsts': _group_by_type(rxn_type_dct),
+                     'arr_key': None,
+                     'arr_kts': None}
+        if len(_CACHE) >= _CACHE_SIZE:
+            _CACHE.pop(next(iter(_CACHE)))  # drop the oldest entry
+        _CACHE[id(rxn_param_dct)] = rxn_cache
+
+    return rxn_cache
+
+
+def _same_items(items, rxn_param_dct):
+    """ Check whether a rxn_param_dct still holds exactly the same rxns and
+        param_tups objects as a cached tuple of its items.
+
+        :param items: (rxn, param_tups) pairs of the dct when it was cached
+        :type items: tuple
+        :param rxn_param_dct:
+        :type rxn_param_dct:
+        :rtype: bool
+    """
+    return len(items) == len(rxn_param_dct) and all(
+        rxn_param_dct.get(rxn) is param_tups for rxn, param_tups in items)
+
+
 def eval_param_tup(param_tup, pressures, temps):
-    """ Look through a param_tup and evaluate k(T,P) based on the contents. Return a ktp_dct.
+    """ Look through a param_tup and evaluate k(T,P) based on the contents. Return a ktp_grid.
 
     :param param_tup:
     :type param_tup:
@@ -62,19 +139,37 @@ def eval_param_tup(param_tup, pressures, temps):
     :type pressures:
     :param temps:
     :type temps:
-    :return ktp_dct: rate constant as a function of temp and pressure
-    :rtype: dct {pressure1: {temps1, kts1}, pressures2: ...}
+    :return ktp_grid: rate constant as a function of temp and pressure
+    :rtype: KTPGrid
+    """
+    type_code, args = _classify(param_tup)
+    ktp_grid = _KERNELS[type_code](*args, temps, pressures)
+
+    return ktp_grid
+
+
+def _classify(param_tup):
+    """ Determine the functional form of a param_tup and unpack the arguments
+        needed to evaluate it.
+
+        :param param_tup:
+        :type param_tup:
+        :return type_code: functional form; one of ARR, LIND, TROE, PLOG, CHEB
+        :rtype: int
+        :return args: arguments for _KERNELS[type_code], which are followed by
+            the temps and pressures
+        :rtype: tuple
     """
     if param_tup[3] is not None:  # Chebyshev
         alpha = param_tup[3]['alpha_elm']
         t_limits = param_tup[3]['t_limits']
         p_limits = param_tup[3]['p_limits']
-        ktp_dct = chebyshev(alpha, t_limits[0], t_limits[1], p_limits[0], p_limits[1],
-                            temps, pressures)
+        type_code = CHEB
+        args = (alpha, t_limits[0], t_limits[1], p_limits[0], p_limits[1])
 
     elif param_tup[4] is not None:  # PLOG
-        plog_dct = param_tup[4]
-        ktp_dct = plog(plog_dct, temps, pressures, t_ref=1.0)
+        type_code = PLOG
+        args = (param_tup[4],)
 
     elif param_tup[2] is not None:  # Troe
         assert param_tup[0] is not None, (
@@ -83,8 +178,6 @@ def eval_param_tup(param_tup, pressures, temps):
         assert param_tup[1] is not None, (
             'Troe and high-P parameters are included, but the low-P parameters are absent'
             )
-        highp_params = param_tup[0]
-        lowp_params = param_tup[1]
         troe_params = param_tup[2]
         alpha = troe_params[0]
         ts3 = troe_params[1]  # T***
@@ -93,32 +186,66 @@ def eval_param_tup(param_tup, pressures, temps):
             ts2 = troe_params[3]  # T**; this one is commonly omitted
         else:
             ts2 = None
-
-        ktp_dct = troe(highp_params, lowp_params, temps, pressures,
-            alpha, ts3, ts1, ts2, collid_factor=1.0)
+        type_code = TROE
+        args = (param_tup[0], param_tup[1], alpha, ts3, ts1, ts2)
 
     elif param_tup[1] is not None:  # Lindemann
         assert param_tup[0] is not None, (
             'Low-P parameters are included, but the high-P parameters are absent'
             )
-        highp_params = param_tup[0]
-        lowp_params = param_tup[1]
-        ktp_dct = lindemann(highp_params, lowp_params, temps, pressures, collid_factor=1.0)
+        type_code = LIND
+        args = (param_tup[0], param_tup[1])
 
     else:  # Arrhenius
         assert param_tup[0] is not None, (
             'The param_tup does not seem to contain any useful information.'
             )
-        # This case is unique as the kTP dictionary contains only one key/value pair
-        highp_params = param_tup[0]
-        kts = arrhenius(highp_params, temps, t_ref=1.0)
-        ktp_dct = {}
-        ktp_dct['high'] = (temps, kts)
+        type_code = ARR
+        args = (param_tup[0],)
+
+    return type_code, args
+
 
-    return ktp_dct
+def _group_by_type(rxn_type_dct):
+    """ Sort the classified param_tups of all rxns by functional form.
 
+        :param rxn_type_dct: (type_code, param_tup) for each param_tup of each rxn
+        :type rxn_type_dct: dict {rxn1: ((type_code1, param_tup1), ...), rxn2: ...}
+        :return type_lsts: lists of (rxn, param_tup), indexed by type_code
+        :rtype: tuple(list)
+    """
+    type_lsts = tuple([] for _ in _KERNELS)
+    for rxn, type_tups in rxn_type_dct.items():
+        for type_code, param_tup in type_tups:
+            type_lsts[type_code].append((rxn, param_tup))
+
+    return type_lsts
+
+
+def _hashable(obj):
+    """ Convert a set of rate parameters, built from numbers, lists, tuples,
+        dicts, and numpy arrays, into a hashable key, so that identical
+        parameter sets can be recognized.
+
+        :param obj: rate parameters
+        :return key: hashable form of the parameters
+        :rtype: tuple
+    """
+    if isinstance(obj, np.ndarray):
+        key = (obj.shape, np.asarray(obj, dtype=float).tobytes())
+    elif isinstance(obj, dict):
+        key = tuple(sorted((float(name), _hashable(val)) for name, val in obj.items()))
+    elif isinstance(obj, (list, tuple)):
+        key = tuple(_hashable(val) for val in obj)
+    elif obj is None:
+        key = None
+    else:
+        key = float(obj)
 
-def chebyshev(alpha, tmin, tmax, pmin, pmax, temps, pressures):
+    return key
+
+
+def chebyshev(alpha, tmin, tmax, pmin, pmax, temps, pressures, precision='fp64'):
     """ Calculates T,P-dependent rate constants [k(T,P)]s using
         a Chebyshev functional expression.
 
@@ -136,21 +263,46 @@ def chebyshev(alpha, tmin, tmax, pmin, pmax, temps, pressures):
         :type temps: numpy.ndarray
         :param pressures: Pressures used to calculate k(T,P)s
         :type pressures: list(float)
-        :return ktp_dct: k(T,Ps) at all temps and pressures
-        :rtype: dict[pressure: temps]
+        :param precision: floating-point precision of the series sum, 'fp64' or
+            'fp32'; the final k(T,P)s are always double precision
+        :type precision: str
+        :return ktp_grid: k(T,Ps) at all temps and pressures
+        :rtype: KTPGrid
     """
+    dtype = _precision_dtype(precision)
+    alpha_nrows, alpha_ncols = alpha.shape
+
+    # For 2-D temps, use the first len(pressures) rows, one per pressure, as in ktp()
+    pres_temps = temps if np.ndim(temps) == 1 else np.asarray(temps)[:len(pressures)]
+
+    # Reduced temperatures and pressures, mapped onto [-1, 1]
+    ctemps = (
+        (2.0 / np.asarray(pres_temps) - 1/tmin - 1/tmax) /
+        (1/tmax - 1/tmin)
+    )
+    cpresses = (
+        (2.0 * np.log10(pressures) - np.log10(pmin) - np.log10(pmax)) /
+        (np.log10(pmax) - np.log10(pmin))
+    )
+
+    # Contract alpha with T_k(cpress) for all pressures, then with T_j(ctemp);
+    # for 2-D temps, each pressure is contracted with its own row of temps
+    tj_vals = _chebyshev_polys(alpha_nrows, ctemps).astype(dtype)  # (nrows, [npres,] ntemps)
+    tk_vals = _chebyshev_polys(alpha_ncols, cpresses).astype(dtype)  # (ncols, npres)
+    tj_coeffs = np.dot(np.asarray(alpha, dtype=dtype), tk_vals)  # (nrows, npres)
+    if np.ndim(temps) == 1:
+        logktps = np.einsum('jp,jt->pt', tj_coeffs, tj_vals)
+    else:
+        logktps = np.einsum('jp,jpt->pt', tj_coeffs, tj_vals)
+    ktps = 10**(logktps.astype(float))
+
     kp_dct = {}
     for idx, pressure in enumerate(pressures):
-        if np.ndim(temps) == 1:
-            kp_dct[pressure] = chebyshev_one_pressure(alpha, tmin, tmax, pmin, pmax, temps,
-                                                      pressure)
-        else:
-            kp_dct[pressure] = chebyshev_one_pressure(alpha, tmin, tmax, pmin, pmax, temps[idx],
-                                                      pressure)
+        kp_dct[pressure] = ktps[idx]
 
-    ktp_dct = ktp(kp_dct, temps)
+    ktp_grid = ktp(kp_dct, temps)
 
-    return ktp_dct
+    return ktp_grid
 
 
 def plog(plog_dct, temps, pressures, t_ref=1.0):
@@ -164,27 +316,61 @@ def plog(plog_dct, temps, pressures, t_ref=1.0):
         :type temps: numpy.ndarray
         :param pressures: Pressures used to calculate k(T,P)s
         :type pressures: list(float)
-        :return ktp_dct: k(T,Ps) at all temps and pressures
-        :rtype: dict[pressure: temps]
+        :return ktp_grid: k(T,Ps) at all temps and pressures
+        :rtype: KTPGrid
     """
     # Set the plog pressures to see if pressure is in range
-    plog_pressures = list(plog_dct.keys())
+    plog_keys = sorted(plog_dct.keys())
+    plog_pressures = np.array(plog_keys, dtype=float)
+    nplog = len(plog_pressures)
+    in_range = [plog_pressures[0] <= pressure <= plog_pressures[-1] for pressure in pressures]
+    sel_pressures = np.asarray(pressures, dtype=float)[in_range]
+
+    # Get k(T)s at every PLOG pressure once; with 2-D temps, each row of
+    # temps stays matched to its own pressure
+    plog_kts = np.array([arrhenius(plog_dct[plog_key], temps, t_ref)
+                         for plog_key in plog_keys])
+    if np.ndim(temps) == 1:
+        plog_kts = plog_kts[:, None, :]
+        rows = np.zeros(len(sel_pressures), dtype=int)
+    else:
+        rows = np.flatnonzero(in_range)
+
+    # Find the two PLOG pressures each pressure of interest sits between
+    log_plog_pressures = np.log10(plog_pressures)
+    log_sel_pressures = np.log10(sel_pressures)
+    idxs_low = np.clip(np.searchsorted(log_plog_pressures, log_sel_pressures, side='right') - 1,
+                       0, max(nplog - 2, 0))
+    idxs_high = np.minimum(idxs_low + 1, nplog - 1)
+    log_pdiffs = log_plog_pressures[idxs_high] - log_plog_pressures[idxs_low]
+    pres_terms = np.divide(log_sel_pressures - log_plog_pressures[idxs_low], log_pdiffs,
+                           out=np.zeros_like(log_sel_pressures), where=log_pdiffs != 0.0)
+
+    # If a pressure equals a PLOG pressure, use that Arrhenius expression
+    # directly; use the PLOG pressure for numerical stability
+    matches = np.isclose(sel_pressures[:, None], plog_pressures[None, :], atol=1.0e-3)
+    matched = matches.any(axis=1)
+    idxs_match = nplog - 1 - np.argmax(matches[:, ::-1], axis=1)  # last match, as before
+    ktps = np.empty((len(sel_pressures), np.shape(temps)[-1]))
+    ktps[matched] = plog_kts[idxs_match[matched], rows[matched]]
+
+    # Otherwise, calculate K(T,P)s with PLOG expression; only these need log10,
+    # so matched rungs with A <= 0 keep their exact k(T)s
+    interp = ~matched
+    logkt_low = np.log10(plog_kts[idxs_low[interp], rows[interp]])
+    logkt_high = np.log10(plog_kts[idxs_high[interp], rows[interp]])
+    ktps[interp] = 10**(logkt_low + ((logkt_high - logkt_low) * pres_terms[interp, None]))
 
     kp_dct = {}
-    for index, pressure in enumerate(pressures):
-        if min(plog_pressures) <= pressure <= max(plog_pressures):
-            if np.ndim(temps) == 1:
-                kp_dct[pressure] = plog_one_pressure(
-                    plog_dct, temps, pressure, t_ref)
-            else:
-                kp_dct[pressure] = plog_one_pressure(
-                    plog_dct, temps[index], pressure, t_ref)
+    sel_keys = [pressure for pressure, keep in zip(pressures, in_range) if keep]
+    for idx, pressure in enumerate(sel_keys):
+        kp_dct[pressure] = ktps[idx]
 
-    # Create the ktp_dct. Note: the high-P limit is not calculated since this does
+    # Create the ktp_grid. Note: the high-P limit is not calculated since this does
     # not exist for PLOG
-    ktp_dct = ktp(kp_dct, temps)
+    ktp_grid = ktp(kp_dct, temps)
 
-    return ktp_dct
+    return ktp_grid
 
 
 def troe(highp_params, lowp_params, temps, pressures,
@@ -210,28 +396,28 @@ def troe(highp_params, lowp_params, temps, pressures,
         :type ts2: float
         :param collid_factor: Buffer enhancement collision factor
         :type collid_factor: float
-        :return ktp_dct: k(T,Ps) at all temps and pressures
-        :rtype: dict[pressure: temps]
+        :return ktp_grid: k(T,Ps) at all temps and pressures
+        :rtype: KTPGrid
     """
+    # The high- and low-P k(T)s do not depend on pressure, so get them only once;
+    # for 2-D temps, use the first len(pressures) rows, one per pressure, as in ktp()
+    pres_temps = temps if np.ndim(temps) == 1 else np.asarray(temps)[:len(pressures)]
+    highp_kts = arrhenius(highp_params, pres_temps, t_ref)
+    lowp_kts = arrhenius(lowp_params, pres_temps, t_ref)
+
+    # Evaluate all pressures at once, giving one row of k(T,P)s per pressure
+    ktps = troe_one_pressure(
+        highp_kts, lowp_kts, pres_temps, np.asarray(pressures, dtype=float),
+        alpha, ts3, ts1, ts2, collid_factor=collid_factor)
+
     kp_dct = {}
     for index, pressure in enumerate(pressures):
-        if np.ndim(temps) == 1:
-            highp_kts = arrhenius(highp_params, temps, t_ref)
-            lowp_kts = arrhenius(lowp_params, temps, t_ref)
-            kp_dct[pressure] = troe_one_pressure(
-                highp_kts, lowp_kts, temps, pressure,
-                alpha, ts3, ts1, ts2, collid_factor=collid_factor)
-        else:
-            highp_kts = arrhenius(highp_params, temps[index], t_ref)
-            lowp_kts = arrhenius(lowp_params, temps[index], t_ref)
-            kp_dct[pressure] = troe_one_pressure(
-                highp_kts, lowp_kts, temps[index], pressure,
-                alpha, ts3, ts1, ts2, collid_factor=collid_factor)
+        kp_dct[pressure] = ktps[index]
 
-    # Create the ktp_dct; this will also add the high-P limit
-    ktp_dct = ktp(kp_dct, temps, highp_params)
+    # Create the ktp_grid; this will also add the high-P limit
+    ktp_grid = ktp(kp_dct, temps, highp_params)
 
-    return ktp_dct
+    return ktp_grid
 
 
 def lindemann(highp_params, lowp_params, temps, pressures, collid_factor=1.0, t_ref=1.0):
@@ -248,26 +434,28 @@ def lindemann(highp_params, lowp_params, temps, pressures, collid_factor=1.0, t_
         :type pressures: list(float)
         :param collid_factor: Buffer enhancement collision factor
         :type collid_factor: float
-        :return ktp_dct: k(T,Ps) at all temps and pressures
-        :rtype: dict[pressure: temps]
+        :return ktp_grid: k(T,Ps) at all temps and pressures
+        :rtype: KTPGrid
     """
+    # The high- and low-P k(T)s do not depend on pressure, so get them only once;
+    # for 2-D temps, use the first len(pressures) rows, one per pressure, as in ktp()
+    pres_temps = temps if np.ndim(temps) == 1 else np.asarray(temps)[:len(pressures)]
+    highp_kts = arrhenius(highp_params, pres_temps, t_ref)
+    lowp_kts = arrhenius(lowp_params, pres_temps, t_ref)
+
+    # Evaluate all pressures at once, giving one row of k(T,P)s per pressure
+    ktps = lindemann_one_pressure(
+        highp_kts, lowp_kts, pres_temps, np.asarray(pressures, dtype=float),
+        collid_factor=collid_factor)
+
     kp_dct = {}
     for index, pressure in enumerate(pressures):
-        if np.ndim(temps) == 1:
-            highp_kts = arrhenius(highp_params, temps, t_ref)
-            lowp_kts = arrhenius(lowp_params, temps, t_ref)
-            kp_dct[pressure] = lindemann_one_pressure(
-                highp_kts, lowp_kts, temps, pressure, collid_factor=collid_factor)
-        else:
-            highp_kts = arrhenius(highp_params, temps[index], t_ref)
-            lowp_kts = arrhenius(lowp_params, temps[index], t_ref)
-            kp_dct[pressure] = lindemann_one_pressure(
-                highp_kts, lowp_kts, temps[index], pressure, collid_factor=collid_factor)
+        kp_dct[pressure] = ktps[index]
 
-    # Create the ktp_dct; this will also add the high-P limit
-    ktp_dct = ktp(kp_dct, temps, highp_params)
+    # Create the ktp_grid; this will also add the high-P limit
+    ktp_grid = ktp(kp_dct, temps, highp_params)
 
-    return ktp_dct
+    return ktp_grid
 
 
 def arrhenius(params, temps, t_ref=1.0, rval=RC):
@@ -290,17 +478,111 @@ def arrhenius(params, temps, t_ref=1.0, rval=RC):
     n_par = params[1]  # temperature exponent
     ea_par = params[2]  # activation energy (cal/mol)
 
-    kts = a_par * ((temps / t_ref)**n_par) * np.exp(-ea_par/(rval*temps))
+    # Skip the power and/or the exponential when they reduce to unity
+    if n_par == 0.0 and ea_par == 0.0:  # temperature-independent
+        kts = np.full(np.shape(temps), a_par, dtype=float)
+    elif n_par == 0.0:
+        kts = a_par * np.exp(-ea_par/(rval*temps))
+    elif ea_par == 0.0:
+        kts = a_par * _reduced_temp_power(temps, t_ref, n_par)
+    else:
+        kts = a_par * _reduced_temp_power(temps, t_ref, n_par) * np.exp(-ea_par/(rval*temps))
+
+    return kts
+
+
+def _reduced_temp_power(temps, t_ref, n_par):
+    """ Calculates (T/T_ref)**n, using multiplications and square roots
+        in place of a general power for small integer and half-integer n.
+
+        :param temps: List of temperatures (K)
+        :type temps: numpy.ndarray
+        :param t_ref: Reference temperature (K)
+        :type t_ref: float
+        :param n_par: temperature exponent
+        :type n_par: float
+        :rtype: numpy.ndarray
+    """
+    reduced_temps = temps / t_ref
+    if n_par in (1.0, 2.0, 3.0, 4.0, -1.0, -2.0, -3.0, -4.0):
+        powers = reduced_temps
+        for _ in range(abs(int(n_par)) - 1):
+            powers = powers * reduced_temps
+        if n_par < 0.0:
+            powers = 1.0 / powers
+    elif n_par in (0.5, 1.5, -0.5, -1.5):
+        powers = np.sqrt(reduced_temps)
+        if abs(n_par) == 1.5:
+            powers = powers * reduced_temps
+        if n_par < 0.0:
+            powers = 1.0 / powers
+    else:
+        powers = reduced_temps**n_par
+
+    return powers
+
+
+def _arrhenius_batch(params_lst, temps, t_ref=1.0, rval=RC):
+    """ Calculate T-dependent rate constants [k(T)]s for several single Arrhenius
+        expressions at once, broadcasting the parameters against the temps.
+
+        :param params_lst: Arrhenius parameters for each expression
+        :type params_lst: list(list(float)); [[A1, n1, Ea1], [A2, n2, Ea2], ...]
+        :param temps: List of temperatures (K)
+        :type temps: numpy.ndarray
+        :param t_ref: Reference temperature (K)
+        :type t_ref: float
+        :return kts: T-dependent rate constants, one row per expression
+        :rtype: numpy.ndarray of shape (nexpr, ntemps)
+    """
+    params_arr = np.asarray(params_lst, dtype=float)
+    assert params_arr.ndim == 2 and params_arr.shape[1] == 3, (
+        f'Arrhenius parameters have shape {params_arr.shape}, but it should be (nexpr, 3)'
+        )
+
+    a_pars = params_arr[:, 0, None]  # pre-exponential A factors (molar basis)
+    n_pars = params_arr[:, 1, None]  # temperature exponents
+    ea_pars = params_arr[:, 2, None]  # activation energies (cal/mol)
+    temps = np.asarray(temps, dtype=float)[None, :]
+
+    # As in arrhenius, skip the power and/or the exponential when they reduce
+    # to unity for every expression; masking single rows costs more than it saves
+    kts = a_pars
+    if np.any(n_pars != 0.0):
+        kts = kts * ((temps / t_ref)**n_pars)
+    if np.any(ea_pars != 0.0):
+        kts = kts * np.exp(-ea_pars/(rval*temps))
+    if kts.shape[1] != temps.shape[1]:  # temperature-independent
+        kts = np.repeat(kts, temps.shape[1], axis=1)
 
     return kts
 
 
+def _arrhenius_kernel(highp_params, temps, _pressures):
+    """ Evaluates a pure Arrhenius expression as a kTP grid with only the high-P row
+    """
+    return ktp({}, temps, highp_params, t_ref=1.0)
+
+
+def _troe_kernel(highp_params, lowp_params, alpha, ts3, ts1, ts2, temps, pressures):
+    """ Evaluates a Troe expression with its arguments in the order given by _classify
+    """
+    return troe(highp_params, lowp_params, temps, pressures,
+                alpha, ts3, ts1, ts2, collid_factor=1.0)
+
+
+# Codes for each functional form, used to index _KERNELS
+ARR, LIND, TROE, PLOG, CHEB = range(5)
+_KERNELS = (_arrhenius_kernel, lindemann, _troe_kernel, plog, chebyshev)
+
+
 ##################### SECTION 3 OF 4: SECONDARY RATE CONSTANT FUNCTIONS #####################
 
 # These functions support the primary functions in Section 2.
 
 
-def chebyshev_one_pressure(alpha, tmin, tmax, pmin, pmax, temps, pressure):
+def chebyshev_one_pressure(alpha, tmin, tmax, pmin, pmax, temps, pressure,
+                           precision='fp64'):
     """ Calculates T,P-dependent rate constants [k(T,P)]s using
         a Chebyshev functional expression, at a given pressure,
         across several temperatures.
@@ -319,33 +601,30 @@ def chebyshev_one_pressure(alpha, tmin, tmax, pmin, pmax, temps, pressure):
         :type temps: numpy.ndarray
         :param pressure: Pressure used to calculate k(T,P)s
         :type pressure: float
+        :param precision: floating-point precision of the series sum, 'fp64' or
+            'fp32'; the final k(T,P)s are always double precision
+        :type precision: str
         :return ktps: Set of k(T,P)s at given pressure
         :rtype numpy.ndarray
     """
-
+    dtype = _precision_dtype(precision)
     alpha_nrows, alpha_ncols = alpha.shape
 
-    ktps = np.zeros(len(temps))
-    for i, temp in enumerate(temps):
-        ctemp = (
-            (2.0 * 1/temp - 1/tmin - 1/tmax) /
-            (1/tmax - 1/tmin)
-        )
-        cpress = (
-            (2.0 * np.log10(pressure) - np.log10(pmin) - np.log10(pmax)) /
-            (np.log10(pmax) - np.log10(pmin))
-        )
-
-        logktp = 0.0
-        for j in range(alpha_nrows):
-            for k in range(alpha_ncols):
-                logktp += (
-                    alpha[j][k] *
-                    eval_chebyt(j, ctemp) *
-                    eval_chebyt(k, cpress)
-                )
+    # Reduced temperatures and pressure, mapped onto [-1, 1]
+    ctemps = (
+        (2.0 / np.asarray(temps) - 1/tmin - 1/tmax) /
+        (1/tmax - 1/tmin)
+    )
+    cpress = (
+        (2.0 * np.log10(pressure) - np.log10(pmin) - np.log10(pmax)) /
+        (np.log10(pmax) - np.log10(pmin))
+    )
 
-        ktps[i] = 10**(logktp)
+    # Sum alpha[j][k] * T_j(ctemp) * T_k(cpress) as two matrix products
+    tj_vals = _chebyshev_polys(alpha_nrows, ctemps).astype(dtype)  # shape (nrows, ntemps)
+    tk_vals = _chebyshev_polys(alpha_ncols, cpress).astype(dtype)  # shape (ncols,)
+    logktps = np.dot(np.asarray(alpha, dtype=dtype), tk_vals) @ tj_vals
+    ktps = 10**(logktps.astype(float))
 
     return ktps
 
@@ -413,7 +692,8 @@ def troe_one_pressure(highp_kts, lowp_kts, temps, pressure,
                       alpha, ts3, ts1, ts2=None, collid_factor=1.0):
     """ Calculates T,P-dependent rate constants [k(T,P)]s using
         a Troe functional expression, at a given pressure,
-        across several temperatures.
+        across several temperatures. An array of pressures
+        gives one row of k(T,P)s per pressure.
 
         :param highp_ks: k(T)s determined at high-pressure
         :type highp_ks: numpy.ndarray
@@ -421,8 +701,8 @@ def troe_one_pressure(highp_kts, lowp_kts, temps, pressure,
         :type lowp_ks: numpy.ndarray
         :param temps: Temps used to calculate high- and low-k(T)s
         :type temps: numpy.ndarray
-        :param pressures: Pressure used to calculate k(T,P)s
-        :type pressure: float
+        :param pressure: Pressure(s) used to calculate k(T,P)s
+        :type pressure: float or numpy.ndarray
         :param alpha: Troe alpha parameter
         :type alpha: float
         :param ts3: Troe T3 parameter
@@ -449,7 +729,8 @@ def lindemann_one_pressure(highp_kts, lowp_kts, temps, pressure,
                            collid_factor=1.0):
     """ Calculates T,P-dependent rate constants [k(T,P)]s using
         a Lindemann functional expression, at a given pressure,
-        across several temperatures.
+        across several temperatures. An array of pressures
+        gives one row of k(T,P)s per pressure.
 
         :param highp_kts: k(T)s determined at high-pressure
         :type highp_kts: numpy.ndarray
@@ -457,8 +738,8 @@ def lindemann_one_pressure(highp_kts, lowp_kts, temps, pressure,
         :type lowp_kts: numpy.ndarray
         :param temps: Temps used to calculate high- and low-k(T)s
         :type temps: numpy.ndarray
-        :param pressure: Pressure used to calculate k(T,P)s
-        :type pressure: float
+        :param pressure: Pressure(s) used to calculate k(T,P)s
+        :type pressure: float or numpy.ndarray
         :param collid_factor: Buffer enhancement collision factor
         :type collid_factor: float
         :return ktps: Set of k(T,P)s at given pressure
@@ -474,6 +755,7 @@ def lindemann_one_pressure(highp_kts, lowp_kts, temps, pressure,
 def _pr_term(highp_rateks, lowp_rateks, temps, pressure, collid_factor=1.0, rval=RC2):
     """ Calculates the reduced pressure term for a single pressure
         used for Lindemann and Troe P-dependent functional expressions.
+        An array of pressures gives one row of terms per pressure.
 
         :param list highp_ks: k(T)s determined at high-pressure
         :type highp_ks: numpy.ndarray
@@ -481,8 +763,8 @@ def _pr_term(highp_rateks, lowp_rateks, temps, pressure, collid_factor=1.0, rval
         :type lowp_ks: numpy.ndarray
         :param temps: Temps used to calculate high- and low-k(T)s
         :temps: numpy.ndarray
-        :param pressure: Pressure used to calculate reduced pressure
-        :type pressure: float
+        :param pressure: Pressure(s) used to calculate reduced pressure
+        :type pressure: float or numpy.ndarray
         :rtype: numpy.ndarray
     """
     pr_term = (
@@ -514,18 +796,19 @@ def _f_broadening_term(pr_term, alpha, ts3, ts1, ts2, temp):
     """
 
     # Calculate Fcent term
-    f_cent = ((1.0 - alpha) * np.exp(-temp / ts3) +
-              alpha * np.exp(-temp / ts1))
+    f_cent = ((1.0 - alpha) * np.exp(-temp * (1.0 / ts3)) +
+              alpha * np.exp(-temp * (1.0 / ts1)))
     if ts2 is not None:
         f_cent += np.exp(-ts2 / temp)
 
-    # Calculate the Log F term
-    c_val = -0.4 - 0.67 * np.log10(f_cent)
-    n_val = 0.75 - 1.27 * np.log10(f_cent)
+    # Calculate the Log F term; each log10 is only taken once
+    log_f_cent = np.log10(f_cent)
+    c_val = -0.4 - 0.67 * log_f_cent
+    n_val = 0.75 - 1.27 * log_f_cent
+    log_pr_c = np.log10(pr_term) + c_val
     d_val = 0.14
-    val = ((np.log10(pr_term) + c_val) /
-           (n_val - d_val * (np.log10(pr_term) + c_val)))**2
-    logf = (1.0 + val)**(-1) * np.log10(f_cent)
+    val = (log_pr_c / (n_val - d_val * log_pr_c))**2
+    logf = log_f_cent / (1.0 + val)
 
     # Calculate F broadening term
     f_term = 10**(logf)
@@ -533,48 +816,129 @@ def _f_broadening_term(pr_term, alpha, ts3, ts1, ts2, temp):
     return f_term
 
 
+def _chebyshev_polys(nterms, xvals):
+    """ Evaluates the first nterms Chebyshev polynomials of the first kind
+        at all values in a single call to scipy's eval_chebyt.
+
+        :param nterms: number of polynomials, T_0 through T_nterms-1
+        :type nterms: int
+        :param xvals: value(s) at which to evaluate the polynomials
+        :type xvals: float or numpy.ndarray
+        :return polys: polynomial values, indexed by order along axis 0
+        :rtype: numpy.ndarray of shape (nterms,) + np.shape(xvals)
+    """
+    xvals = np.asarray(xvals, dtype=float)
+    orders = np.arange(nterms).reshape((nterms,) + (1,) * xvals.ndim)
+    polys = eval_chebyt(orders, xvals)
+
+    return polys
+
+
+def _precision_dtype(precision):
+    """ Converts a precision name, 'fp64' or 'fp32', to a numpy dtype
+    """
+    assert precision in _PRECISION_DTYPES, (
+        f'Precision is {precision}, but it should be one of {tuple(_PRECISION_DTYPES)}'
+        )
+
+    return _PRECISION_DTYPES[precision]
+
+
 def p_to_m(pressure, temps, rval=RC2):
     """ Convert the pressure to the concentration of a gas [M]
         assuming an ideal gas form where [M] ~ P/RT.
 
-        :param pressure: pressure of gas (in atm)
-        :type pressure: float
+        :param pressure: pressure(s) of gas (in atm); an array of pressures
+            gives one row of concentrations per pressure
+        :type pressure: float or numpy.ndarray
         :return: concentration of gas (mol/cm^3)
-        :rtype: float
+        :rtype: float or numpy.ndarray
     """
-    return pressure / (rval * temps)
+    return _pressure_column(pressure) / (rval * temps)
+
+
+def _pressure_column(pressure):
+    """ Shapes a 1-D array of pressures as a column, so that it broadcasts
+        against 1-D temps (or 2-D temps with one row per pressure) to give
+        one row per pressure. Scalar pressures are returned unchanged.
+    """
+    if np.ndim(pressure) == 1:
+        pressure = np.asarray(pressure, dtype=float)[:, None]
+
+    return pressure
 
 
 def ktp(kp_dct, temps, highp_params=None, t_ref=1.0):
-    """ Creates a kTP dictionary from a kP dictionary and an
+    """ Creates a kTP grid from a kP dictionary and an
         array of temperatures
 
         :param kp_dct: dct of the form {P:[k@T1, k@T2]}
         :type kp_dct: {float: np.array}
         :param temps: array of temperatures, either 1- or 2-D
         :type temps: np.ndarray
-        :return ktp_dct:
-        :rtype:
+        :return ktp_grid: k(T,Ps) at all temps and pressures
+        :rtype: KTPGrid
 
     """
-    ktp_dct = {}
-    for index, pressure in enumerate(kp_dct):
-        kts = kp_dct[pressure]
-        if np.ndim(temps) == 1:  # if the dimensionality of temps is 1
-            ktp_dct[pressure] = (temps,kts)
-        else:  # if the dimensionality of temps is 2
-            ktp_dct[pressure] = (temps[index],kts)
-
-    # Add the high-P k(T)s to the kTP dictionary if needed
+    pressures = list(kp_dct.keys())
+    ntemps = np.shape(temps)[-1]
+    kts = np.reshape([kp_dct[pressure] for pressure in pressures], (len(pressures), ntemps))
+    if np.ndim(temps) == 1:  # if the dimensionality of temps is 1
+        grid_temps = np.tile(temps, (len(pressures), 1))
+    else:  # if the dimensionality of temps is 2
+        grid_temps = np.reshape(temps[:len(pressures)], (len(pressures), ntemps))
+
+    # Add the high-P k(T)s to the kTP grid if needed
     if highp_params:
         if np.ndim(temps) == 1:
-            highp_kts = arrhenius(highp_params, temps, t_ref)
-            ktp_dct['high'] = (temps,highp_kts)
+            highp_temps = temps
         else:
-            highp_kts = arrhenius(highp_params, temps[-1], t_ref)  # use the last value in temps
-            ktp_dct['high'] = (temps[-1],highp_kts)
-
-    return ktp_dct
+            highp_temps = temps[-1]  # use the last value in temps
+        highp_kts = arrhenius(highp_params, highp_temps, t_ref)
+        pressures.append(np.inf)
+        grid_temps = np.vstack((grid_temps, highp_temps))
+        kts = np.vstack((kts, highp_kts))
+
+    return KTPGrid(pressures, grid_temps, kts)
+
+
+def add_ktp_grids(ktp_grid1, ktp_grid2):
+    """ Add the rates in two ktp_grids. The input grids should have identical P and T values.
+        However, this may not always be true if one is from PLOG and one is from an expression
+        with a pressure-independent rate; a pressure missing from one of the grids
+        contributes zero to the sum. The rows of the added grid are sorted by pressure.
+
+        :param ktp_grid1: first grid; None is treated as an empty grid
+        :type ktp_grid1: KTPGrid
+        :param ktp_grid2: second grid
+        :type ktp_grid2: KTPGrid
+        :return added_grid: sum of the two grids
+        :rtype: KTPGrid
+    """
+    if ktp_grid1 is None:  # if the starting grid is empty, just use the addition
+        # No copy is needed: grids are never modified in place once built, and
+        # the sum below always writes to new arrays
+        added_grid = ktp_grid2
+    else:
+        pressures = np.union1d(ktp_grid1.pressures, ktp_grid2.pressures)
+        idxs1 = np.searchsorted(pressures, ktp_grid1.pressures)
+        idxs2 = np.searchsorted(pressures, ktp_grid2.pressures)
+        shape = (len(pressures), np.shape(ktp_grid1.kts)[1])
+
+        # Temps and keys are taken from the first grid wherever the pressure is shared
+        temps = np.zeros(shape)
+        temps[idxs2] = ktp_grid2.temps
+        temps[idxs1] = ktp_grid1.temps
+        keys = [None] * len(pressures)
+        for idxs, ktp_grid in ((idxs2, ktp_grid2), (idxs1, ktp_grid1)):
+            for idx, key in zip(idxs, ktp_grid.keys):
+                keys[idx] = key
+        kts = np.zeros(shape)
+        kts[idxs1] += ktp_grid1.kts
+        kts[idxs2] += ktp_grid2.kts
+        added_grid = KTPGrid(pressures, temps, kts, keys)
+
+    return added_grid
 
 
 def check_p_t(pressures, temps):
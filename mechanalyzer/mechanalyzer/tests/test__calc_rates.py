@@ -20,6 +20,9 @@ ARRHENIUS_RXN_PARAM_DCT = {
     LOW_P_RXN: ((LOW_P_PARAMS, None, None, None, None, None),)
 }
 ARRHENIUS_KTS = np.array([8.8273E+1, 2.0086E+6, 3.0299E+8])
+CONST_ARRHENIUS_RXN_PARAM_DCT = {
+    LOW_P_RXN: (([2.0E+13, 0, 0], None, None, None, None, None),)
+}
 
 LINDEMANN_RXN_PARAM_DCT = {
     HIGH_P_RXN: ((HIGH_P_PARAMS, LOW_P_PARAMS, None, None, None, None),)
@@ -95,6 +98,27 @@ def test__arrhenius():
     assert np.allclose(calc_rates, ARRHENIUS_KTS, rtol=1e-3)
 
 
+def test__const_arrhenius():
+    """ Test the Arrhenius calculator for a T-independent rate
+    """
+    rxn_ktp_dct = rates.eval_rxn_param_dct(
+        CONST_ARRHENIUS_RXN_PARAM_DCT, PRESSURES, TEMPS)
+    calc_rates = rxn_ktp_dct[LOW_P_RXN]['high'][1]
+    assert calc_rates.dtype == float
+    assert np.allclose(calc_rates, 2.0E+13 * np.ones(len(TEMPS)))
+    calc_rates = rates.arrhenius([2.0E+13, 0, 0], TEMPS)
+    assert calc_rates.dtype == float
+    assert np.allclose(calc_rates, 2.0E+13 * np.ones(len(TEMPS)))
+
+
+def test__reduced_temp_power():
+    """ Test the shortcuts for (T/T_ref)**n against the general power
+    """
+    for n_par in (1, 2, 3, 4, -1, -3, 0.5, 1.5, -0.5, -1.5, 2.37):
+        calc_powers = rates.arrhenius([1.0, n_par, 0], TEMPS, t_ref=298.0)  # A=1, Ea=0
+        assert np.allclose(calc_powers, (TEMPS / 298.0)**n_par, rtol=1e-12)
+
+
 def test__lindemann():
     """ Test the Lindemann calculator
     """
@@ -104,6 +128,17 @@ def test__lindemann():
     assert np.allclose(calc_rates, LINDEMANN_10ATM_KTS, rtol=1e-3)
 
 
+def test__lindemann_2d_temps():
+    """ Test the Lindemann calculator with 2-D temps that include a high-P row
+    """
+    temps = np.tile(TEMPS, (4, 1))  # one row per pressure plus the high-P row
+    rxn_ktp_dct = rates.eval_rxn_param_dct(
+        LINDEMANN_RXN_PARAM_DCT, PRESSURES[1:], temps)
+    calc_rates = rxn_ktp_dct[HIGH_P_RXN][10][1]  # test 10 atm rates
+    assert np.allclose(calc_rates, LINDEMANN_10ATM_KTS, rtol=1e-3)
+    assert np.allclose(rxn_ktp_dct[HIGH_P_RXN]['high'][0], temps[-1])
+
+
 def test__troe():
     """ Test the Troe calculator
     """
@@ -113,6 +148,17 @@ def test__troe():
     assert np.allclose(calc_rates, TROE_10ATM_KTS, rtol=1e-3)
 
 
+def test__troe_2d_temps():
+    """ Test the Troe calculator with 2-D temps that include a high-P row
+    """
+    temps = np.tile(TEMPS, (4, 1))  # one row per pressure plus the high-P row
+    rxn_ktp_dct = rates.eval_rxn_param_dct(
+        TROE_RXN_PARAM_DCT, PRESSURES[1:], temps)
+    calc_rates = rxn_ktp_dct[HIGH_P_RXN][10][1]  # test 10 atm rates
+    assert np.allclose(calc_rates, TROE_10ATM_KTS, rtol=1e-3)
+    assert np.allclose(rxn_ktp_dct[HIGH_P_RXN]['high'][0], temps[-1])
+
+
 def test__plog():
     """ Test the PLOG calculator
     """
@@ -122,6 +168,21 @@ def test__plog():
     assert np.allclose(calc_rates, PLOG_10ATM_KTS, rtol=1e-3)
 
 
+def test__plog_negative_a():
+    """ Test the PLOG calculator at PLOG pressures with negative A factors
+    """
+    plog_dct = {0.1: [-1.0E+15, 0.3, 59810],
+                1: [1.0E+16, 0, 5000],
+                10: [-1.0E+17, 2, 59810]}
+    rxn_param_dct = {HIGH_P_RXN: ((None, None, None, None, plog_dct, None),)}
+    with np.errstate(all='raise'):
+        rxn_ktp_dct = rates.eval_rxn_param_dct(
+            rxn_param_dct, np.array([0.1, 1, 10]), TEMPS)
+    for pressure, params in plog_dct.items():
+        calc_rates = rxn_ktp_dct[HIGH_P_RXN][pressure][1]
+        assert np.allclose(calc_rates, rates.arrhenius(params, TEMPS))
+
+
 def test__chebyshev():
     """ Test the Chebyshev calculator
     """
@@ -131,6 +192,40 @@ def test__chebyshev():
     assert np.allclose(calc_rates, CHEBYSHEV_100ATM_KTS, rtol=1e-3)
 
 
+def test__chebyshev_one_pressure():
+    """ Test the single-pressure Chebyshev calculator at both precisions
+    """
+    cheb_dct = CHEBYSHEV_RXN_PARAM_DCT[HIGH_P_RXN][0][3]
+    for precision in ('fp64', 'fp32'):
+        calc_rates = rates.chebyshev_one_pressure(
+            cheb_dct['alpha_elm'], *cheb_dct['t_limits'], *cheb_dct['p_limits'],
+            TEMPS2, 100, precision=precision)
+        assert calc_rates.dtype == np.float64
+        assert np.allclose(calc_rates, CHEBYSHEV_100ATM_KTS, rtol=1e-3)
+
+
+def test__chebyshev_2d_temps():
+    """ Test the Chebyshev calculator with 2-D temps that include a high-P row
+    """
+    temps = np.tile(TEMPS2, (4, 1))  # one row per pressure plus the high-P row
+    rxn_ktp_dct = rates.eval_rxn_param_dct(
+        CHEBYSHEV_RXN_PARAM_DCT, PRESSURES[1:], temps)
+    calc_rates = rxn_ktp_dct[HIGH_P_RXN][100][1]  # test 100 atm rates
+    assert np.allclose(calc_rates, CHEBYSHEV_100ATM_KTS, rtol=1e-3)
+
+
+def test__chebyshev_fp32():
+    """ Test the Chebyshev calculator with a single-precision series sum
+    """
+    cheb_dct = CHEBYSHEV_RXN_PARAM_DCT[HIGH_P_RXN][0][3]
+    ktp_grid = rates.chebyshev(
+        cheb_dct['alpha_elm'], *cheb_dct['t_limits'], *cheb_dct['p_limits'],
+        TEMPS2, PRESSURES, precision='fp32')
+    calc_rates = ktp_grid.to_dict()[100][1]  # test 100 atm rates
+    assert calc_rates.dtype == np.float64
+    assert np.allclose(calc_rates, CHEBYSHEV_100ATM_KTS, rtol=1e-3)
+
+
 def test__dup_arrhenius():
     """ Test the Arrhenius calculator for a duplicate reaction
     """
@@ -149,11 +244,100 @@ def test__dup_plog():
     assert np.allclose(calc_rates, 2*PLOG_10ATM_KTS, rtol=1e-3)
 
 
+def test__repeated_params():
+    """ Test that rxns with identical parameters get equal, unshared rates
+    """
+    rxn_param_dct = {
+        HIGH_P_RXN: TROE_RXN_PARAM_DCT[HIGH_P_RXN],
+        (('N2O',), ('N2', 'O'), ('(+N2)',)): TROE_RXN_PARAM_DCT[HIGH_P_RXN]
+    }
+    rxn_ktp_dct = rates.eval_rxn_param_dct(rxn_param_dct, PRESSURES, TEMPS)
+    kts1, kts2 = (ktp_dct[10][1] for ktp_dct in rxn_ktp_dct.values())
+    assert np.allclose(kts1, TROE_10ATM_KTS, rtol=1e-3)
+    assert np.allclose(kts2, TROE_10ATM_KTS, rtol=1e-3)
+    assert not np.shares_memory(kts1, kts2)
+
+
+def test__cache():
+    """ Test repeated calls that reuse the cached classifications and rates
+    """
+    rates.clear_cache()
+    rxn_ktp_dct = rates.eval_rxn_param_dct(
+        DUPLICATE_ARRHENIUS_RXN_PARAM_DCT, PRESSURES, TEMPS)
+    rxn_ktp_dct[LOW_P_RXN]['high'][1][:] = 0.0  # in-place changes stay local
+    rxn_ktp_dct = rates.eval_rxn_param_dct(
+        DUPLICATE_ARRHENIUS_RXN_PARAM_DCT, PRESSURES, TEMPS)
+    assert np.allclose(rxn_ktp_dct[LOW_P_RXN]['high'][1], 2*ARRHENIUS_KTS, rtol=1e-3)
+    rxn_ktp_dct = rates.eval_rxn_param_dct(
+        DUPLICATE_ARRHENIUS_RXN_PARAM_DCT, PRESSURES, TEMPS2)
+    assert np.allclose(rxn_ktp_dct[LOW_P_RXN]['high'][0], TEMPS2)
+    rates.clear_cache()
+
+
+def test__cache_changed_params():
+    """ Test that changes to a cached rxn_param_dct are picked up
+    """
+    rxn_param_dct = {LOW_P_RXN: ((list(LOW_P_PARAMS), None, None, None, None, None),)}
+    rates.eval_rxn_param_dct(rxn_param_dct, PRESSURES, TEMPS)
+    rxn_param_dct[LOW_P_RXN][0][0][0] *= 2.0  # change A in place
+    rxn_ktp_dct = rates.eval_rxn_param_dct(rxn_param_dct, PRESSURES, TEMPS)
+    assert np.allclose(rxn_ktp_dct[LOW_P_RXN]['high'][1], 2*ARRHENIUS_KTS, rtol=1e-3)
+    rxn_param_dct[LOW_P_RXN] = LINDEMANN_RXN_PARAM_DCT[HIGH_P_RXN]  # replace the param_tups
+    rxn_ktp_dct = rates.eval_rxn_param_dct(rxn_param_dct, PRESSURES, TEMPS)
+    assert np.allclose(rxn_ktp_dct[LOW_P_RXN][10][1], LINDEMANN_10ATM_KTS, rtol=1e-3)
+    rxn_param_dct[LOW_P_RXN] = (
+        (HIGH_P_PARAMS, LOW_P_PARAMS, [0.5, 1E-30, 7900], None, None, None),)
+    rates.eval_rxn_param_dct(rxn_param_dct, PRESSURES, TEMPS)
+    rxn_param_dct[LOW_P_RXN][0][2][0] = HIGH_P_PARAMS2[0]  # change the Troe alpha in place
+    rxn_ktp_dct = rates.eval_rxn_param_dct(rxn_param_dct, PRESSURES, TEMPS)
+    assert np.allclose(rxn_ktp_dct[LOW_P_RXN][10][1], TROE_10ATM_KTS, rtol=1e-3)
+    rates.clear_cache()
+
+
+def test__add_ktp_grids():
+    """ Test the addition of k(T,P) grids with different pressures
+    """
+    arr_grid = rates.eval_param_tup(
+        ARRHENIUS_RXN_PARAM_DCT[LOW_P_RXN][0], PRESSURES, TEMPS)
+    plog_grid = rates.eval_param_tup(
+        PLOG_RXN_PARAM_DCT[HIGH_P_RXN][0], PRESSURES, TEMPS)
+    added_grid = rates.add_ktp_grids(arr_grid, plog_grid)
+    assert np.allclose(added_grid.pressures, np.append(PRESSURES, np.inf))
+    ktp_dct = added_grid.to_dict()
+    assert np.allclose(ktp_dct['high'][1], ARRHENIUS_KTS, rtol=1e-3)
+    assert np.allclose(ktp_dct[0.316][1], PLOG_10ATM_KTS, rtol=1e-3)
+
+
+
+def test__pressure_keys():
+    """ Test that the ktp_dcts keep the pressures as given
+    """
+    rxn_param_dct = {
+        HIGH_P_RXN: (ARRHENIUS_RXN_PARAM_DCT[LOW_P_RXN][0], TROE_RXN_PARAM_DCT[HIGH_P_RXN][0])
+    }
+    rxn_ktp_dct = rates.eval_rxn_param_dct(rxn_param_dct, [1, 10, 100], TEMPS)
+    assert list(rxn_ktp_dct[HIGH_P_RXN]) == [1, 10, 100, 'high']
+    assert all(isinstance(pressure, int) for pressure in list(rxn_ktp_dct[HIGH_P_RXN])[:-1])
+
+
 if __name__ == '__main__':
     test__arrhenius()
+    test__const_arrhenius()
+    test__reduced_temp_power()
     test__lindemann()
+    test__lindemann_2d_temps()
     test__troe()
+    test__troe_2d_temps()
     test__plog()
+    test__plog_negative_a()
     test__chebyshev()
+    test__chebyshev_one_pressure()
+    test__chebyshev_2d_temps()
+    test__chebyshev_fp32()
     test__dup_arrhenius()
     test__dup_plog()
+    test__repeated_params()
+    test__cache()
+    test__cache_changed_params()
+    test__add_ktp_grids()
+    test__pressure_keys()